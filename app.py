@@ -4,11 +4,13 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from pathlib import Path
 import re
 import datetime
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 # 1. PAGE CONFIGURATION
 st.set_page_config(
@@ -19,12 +21,19 @@ st.set_page_config(
 )
 
 # 2. LOAD CSS
-def load_css():
+@st.cache_resource(show_spinner=False)
+def read_css():
+    # Read and wrapped once per process
     css_path = Path(__file__).parent / "style.css"
-    if css_path.exists():
-        st.markdown(f"<style>{css_path.read_text()}</style>", unsafe_allow_html=True)
+    return f"<style>{css_path.read_text()}</style>" if css_path.exists() else None
+
+def load_css():
+    # Injection still happens every run: Streamlit drops any element that a rerun does not emit again
+    css = read_css()
+    if css:
+        st.markdown(css, unsafe_allow_html=True)
     else:
-        st.warning("⚠️ Style file not found. Ensure 'assets/style.css' exists.")
+        st.warning("⚠️ Style file not found. Ensure 'style.css' exists next to app.py.")
 
 load_css()
 
@@ -54,62 +63,6 @@ with st.container():
     # CUSTOM APP BAR
     # -----------------------------------------------------------------------------
     st.markdown("""
-    <style>
-    /* Fixed App Bar */
-    .app-bar {
-        background: white;
-        padding: 12px 24px;
-        border-bottom: 1px solid #e2e8f0;
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        margin: -2rem -6rem 0rem -6rem !important; /* Zero bottom margin to connect with toolbar */
-        position: sticky;
-        top: 0;
-        z-index: 999;
-    }
-    
-    /* Toolbar Area (Sub-header) */
-    .toolbar-container {
-        background: white;
-        padding: 8px 24px;
-        border-bottom: 1px solid #e2e8f0;
-        margin: 0rem -6rem 1rem -6rem !important; 
-        display: flex;
-        align-items: center;
-        gap: 16px;
-    }
-    
-    .app-bar-title {
-        font-family: 'Outfit', sans-serif;
-        font-weight: 600;
-        font-size: 18px;
-        color: #0f172a;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-    }
-    .app-bar-icon {
-        font-size: 20px;
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        background: #f0fdf4;
-        color: #16a34a;
-        width: 32px;
-        height: 32px;
-        border-radius: 8px;
-    }
-    .app-bar-badge {
-        background: #f1f5f9;
-        color: #64748b;
-        font-size: 11px;
-        padding: 4px 8px;
-        border-radius: 99px;
-        font-weight: 500;
-        text-transform: uppercase;
-    }
-    </style>
     <!-- 1. The Top Bar -->
     <div class="app-bar">
         <div class="app-bar-title">
@@ -157,24 +110,140 @@ page = page_main
 # ------------------------------------------------------------
 # 4. DATA ENGINE (v10 - Deep Cleaning & Normalization)
 # ------------------------------------------------------------
-@st.cache_data
-def load_data_v10():
-    file_path = "Mechatronics Project Parts_Data.xlsx"
-    if not Path(file_path).exists(): return None, None, None
+DATA_FILE = "Mechatronics Project Parts_Data.xlsx"
+
+def data_signature():
+    # Cache key for everything derived from the workbook: editing the file invalidates it.
+    # ns mtime + size also catches same-second saves and copies that keep the timestamp
+    p = Path(DATA_FILE)
+    if not p.exists(): return None
+    stat = p.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+# Disk cache of the *cleaned* sheets, keyed by workbook content hash.
+# Survives process restarts, unlike the in-memory st.cache_data.
+CACHE_DIR = Path(".cache")
+CACHE_PARTS = ("comp", "sets", "proj", "bom")
+CACHE_VERSION = b"8" # Bump whenever the cleaned output of load_data_v10 changes
+
+def file_digest(file_path):
+    h = hashlib.blake2b(Path(file_path).read_bytes(), digest_size=16)
+    h.update(CACHE_VERSION)
+    return h.hexdigest()
+
+def read_parquet_cache(file_hash):
+    paths = [CACHE_DIR / f"{file_hash}-{part}.parquet" for part in CACHE_PARTS]
+    if not all(p.exists() for p in paths): return None
+    try:
+        # Frames are stored already pruned and Arrow-backed. Don't pass dtype_backend="pyarrow":
+        # it would turn the category columns into Arrow dictionary arrays
+        return tuple(pd.read_parquet(p, engine="pyarrow") for p in paths)
+    except Exception:
+        return None # Corrupt or partial cache -> re-parse the workbook
 
+def write_parquet_cache(file_hash, frames):
     try:
-        xls = pd.ExcelFile(file_path, engine='openpyxl')
+        CACHE_DIR.mkdir(exist_ok=True)
+        # Evict entries left behind by older versions of the workbook
+        for old in CACHE_DIR.glob("*.parquet"):
+            if not old.name.startswith(f"{file_hash}-"): old.unlink()
+        for part, df in zip(CACHE_PARTS, frames):
+            df.to_parquet(CACHE_DIR / f"{file_hash}-{part}.parquet", engine="pyarrow", compression="zstd")
+    except Exception:
+        pass # Caching is best-effort; the app still works from the xlsx
+
+# Cell cleaning patterns (compiled once, applied per distinct value)
+_FLOAT_RE = re.compile(r'\.0$')
+_JUNK_RE = re.compile(r'(?i)^(nan|none|unknown|undefined|null|nat|0)$')
+
+# Column-name rules used by clean()
+ID_KEYS = ('no', 'id', 'code', 'mfg')
+BRAND_KEYS = ("mfg", "manufacturer", "brand")
+BRAND_MAP = {
+    "DFROBOT": "DFRobot", "DFR": "DFRobot", "ADAFRUIT": "Adafruit", 
+    "POLOLU": "Pololu", "SPARKFUN": "SparkFun", "ARDUINO": "Arduino", 
+    "ESPRESSIF": "Espressif", "SEEED": "Seeed Studio"
+}
+
+def _clean_token(s):
+    if not isinstance(s, str): return '-' # NaN survives astype(str) on pandas >= 3
+    s = _FLOAT_RE.sub('', s.strip()) # Fix float strings ("12.0" -> "12")
+    return '-' if _JUNK_RE.match(s) else s # Replace junk with clean dash
+
+def build_bom_long(df_proj):
+    # Long-form BOM: one row per (project, part) with join-ready part numbers,
+    # built once per load instead of melting + re-cleaning on every click
+    if df_proj.empty: return pd.DataFrame(columns=["MfgNo"])
+    p_name_col = df_proj.columns[0]
+    comp_cols = [c for c in df_proj.columns if "Component" in c]
+    bom = df_proj.melt(id_vars=[p_name_col], value_vars=comp_cols, value_name="MfgNo").dropna()
+    # No part cells at all: mapping an empty Series would yield float64 and break .str below
+    if bom.empty: return pd.DataFrame(columns=[p_name_col, "MfgNo"])
+
+    # Clean each distinct key once, exactly like an ID column of the component table
+    keys = bom["MfgNo"].astype(str)
+    bom["MfgNo"] = keys.map({u: _clean_token(u).upper() for u in keys.unique()})
+
+    # Filter junk
+    bom = bom[bom["MfgNo"].str.len() > 1]
+    bom = bom[~bom["MfgNo"].isin(["-", "UNKNOWN", "NAN", "NONE", "NAT", "0"])]
+    return bom[[p_name_col, "MfgNo"]].reset_index(drop=True)
+
+# Columns the dashboards look up via get_col (lower-cased candidates; keep in sync).
+# Other columns of these sheets are never parsed or cleaned.
+COMP_COLUMNS = {
+    "category", "status", "mfg", "manufacturer", "brand", "subcategory", "subcategory2",
+    "mfgno", "mfg no", "partno", "part number", "name", "description", "component name", "link", "url",
+}
+SET_COLUMNS = {
+    "set no", "set", "final status", "status", "link", "url",
+    "xdesign name", "name", "description", "component name", "mfg no", "mfgno", "part no",
+}
+
+def wanted(columns):
+    return lambda c: str(c).strip().lower() in columns
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _open_workbook(file_path, data_sig):
+    # Shared, unhashed workbook handle. Prefer the Rust-based calamine reader;
+    # fall back to openpyxl if it isn't installed
+    try:
+        return pd.ExcelFile(file_path, engine="calamine")
+    except ImportError:
+        return pd.ExcelFile(file_path, engine="openpyxl")
+
+@st.cache_data(show_spinner=False)
+def load_data_v10(data_sig):
+    file_path = DATA_FILE
+    if data_sig is None or not Path(file_path).exists(): return None, None, None, None
+
+    file_hash = file_digest(file_path)
+    cached = read_parquet_cache(file_hash)
+    if cached: return cached
+
+    try:
+        xls = _open_workbook(file_path, data_sig)
+        engine = xls.engine
         
-        # Load Sheets
+        # Resolve Sheets
         comp_sheet = next((s for s in xls.sheet_names if "Component" in s), xls.sheet_names[0])
-        df_comp = pd.read_excel(xls, sheet_name=comp_sheet)
-        
         set_sheet = next((s for s in xls.sheet_names if "Set" in s and "Delivery" in s), None)
         if not set_sheet: set_sheet = next((s for s in xls.sheet_names if "Delivery" in s), None)
-        df_sets = pd.read_excel(xls, sheet_name=set_sheet) if set_sheet else pd.DataFrame()
-
         proj_sheet = next((s for s in xls.sheet_names if "Project" in s and "Considered" in s), None)
-        df_proj = pd.read_excel(xls, sheet_name=proj_sheet) if proj_sheet else pd.DataFrame()
+
+        # Load Sheets concurrently. Each read opens its own handle from the path:
+        # neither engine's workbook object is safe to share across threads
+        def read(sheet, usecols=None):
+            return pd.read_excel(file_path, sheet_name=sheet, engine=engine, usecols=usecols)
+
+        with ThreadPoolExecutor(max_workers=3) as ex:
+            f_comp = ex.submit(read, comp_sheet, wanted(COMP_COLUMNS))
+            f_sets = ex.submit(read, set_sheet, wanted(SET_COLUMNS)) if set_sheet else None
+            # Projects: every column is used (name + Component No1..N), so read it whole
+            f_proj = ex.submit(read, proj_sheet) if proj_sheet else None
+            df_comp = f_comp.result()
+            df_sets = f_sets.result() if f_sets else pd.DataFrame()
+            df_proj = f_proj.result() if f_proj else pd.DataFrame()
 
         # Clean Headers
         for df in [df_comp, df_sets, df_proj]:
@@ -184,57 +253,72 @@ def load_data_v10():
         # --- DEEP CLEANER FUNCTION ---
         def clean(df):
             if df.empty: return df
-            
-            # Helper to normalize ID strings (remove non-alphanumeric for matching)
-            def normalize_id(val):
-                s = str(val).strip().upper()
-                if s.endswith('.0'): s = s[:-2] # Fix floats
-                return s
 
+            # Bucket columns once up-front
+            # Links are left untouched; ID/Code-like columns become UPPERCASE for matching,
+            # everything else Title Case for readability
+            kinds = {}
             for col in df.columns:
-                # Skip Links
-                if "link" in col.lower(): continue
-                
-                # 1. Base conversion
-                df[col] = df[col].astype(str).str.strip()
-                
-                # 2. Fix Float Strings (Global)
-                df[col] = df[col].str.replace(r'\.0$', '', regex=True)
-                
-                # 3. Replace Junk with clean dash
-                df[col] = df[col].replace(
-                    r'(?i)^(nan|none|unknown|undefined|null|nat|0)$', 
-                    '-', 
-                    regex=True
-                )
+                low = col.lower()
+                if "link" in low: kinds[col] = "link"
+                elif any(x in low for x in ID_KEYS): kinds[col] = "id"
+                else: kinds[col] = "text"
+            brands = {col for col in df.columns if col.lower() in BRAND_KEYS}
+
+            for col in df.columns:
+                if kinds[col] == "link": continue
+                case = str.upper if kinds[col] == "id" else str.title
                 
-                # 4. Standardize Case
-                # If column looks like an ID/Code, make it UPPERCASE for matching
-                # Otherwise Title Case for readability
-                if any(x in col.lower() for x in ['no', 'id', 'code', 'mfg']):
-                    df[col] = df[col].str.upper()
-                else:
-                    df[col] = df[col].str.title()
-
-            # 5. Brand Standardization
-            brand_map = {
-                "DFROBOT": "DFRobot", "DFR": "DFRobot", "ADAFRUIT": "Adafruit", 
-                "POLOLU": "Pololu", "SPARKFUN": "SparkFun", "ARDUINO": "Arduino", 
-                "ESPRESSIF": "Espressif", "SEEED": "Seeed Studio"
-            }
-            for c in df.columns:
-                if c.lower() in ["mfg", "manufacturer", "brand"]:
-                    df[c] = df[c].replace(brand_map)
+                # Clean each distinct value once, then broadcast back to the rows
+                values = df[col].astype(str)
+                mapping = {u: case(_clean_token(u)) for u in values.unique()}
+                if col in brands: # Brand Standardization
+                    mapping = {u: BRAND_MAP.get(v, v) for u, v in mapping.items()}
+                df[col] = values.map(mapping)
+
+                # Low-cardinality columns -> category (int codes instead of Python strings)
+                if len(set(mapping.values())) / len(df) < 0.5:
+                    df[col] = df[col].astype("category")
                     
             return df
 
-        return clean(df_comp), clean(df_sets), clean(df_proj)
+        df_comp, df_sets = clean(df_comp), clean(df_sets)
+        # Projects: only the name column is ever displayed. The Component No* columns just feed
+        # the long-form BOM, which cleans its stacked keys in one pass, so they skip clean()'s
+        # column-by-column work and are not kept afterwards
+        part_cols = [c for c in df_proj.columns if "Component" in c]
+        df_proj_names = clean(df_proj.drop(columns=part_cols))
+        df_bom_long = build_bom_long(pd.concat([df_proj_names, df_proj[part_cols]], axis=1))
+        df_proj = df_proj_names
+
+        # Give both sides of the Project Explorer join one shared category dtype
+        col_map = {c.lower(): c for c in df_comp.columns}
+        mfg_col = next((col_map[k] for k in ["mfgno", "mfg no", "partno", "part number"] if k in col_map), None)
+        if mfg_col and not df_bom_long.empty:
+            keys = pd.CategoricalDtype(pd.unique(pd.concat([df_comp[mfg_col], df_bom_long["MfgNo"]]).astype(str)))
+            df_comp[mfg_col] = df_comp[mfg_col].astype(str).astype(keys)
+            df_bom_long["MfgNo"] = df_bom_long["MfgNo"].astype(keys)
+
+        # Remaining string columns -> Arrow-backed strings (contiguous buffers, vectorised
+        # .str kernels); category columns are left as they are
+        df_comp, df_sets, df_proj, df_bom_long = (
+            df.convert_dtypes(dtype_backend="pyarrow") for df in [df_comp, df_sets, df_proj, df_bom_long]
+        )
+
+        # Column lookup map for get_col, built once instead of on every call
+        for df in [df_comp, df_sets, df_proj]:
+            df.attrs["_col_map"] = {c.lower(): c for c in df.columns}
+
+        frames = df_comp, df_sets, df_proj, df_bom_long
+        write_parquet_cache(file_hash, frames)
+        return frames
 
     except Exception as e:
         st.error(f"Data Load Error: {e}")
-        return None, None, None
+        return None, None, None, None
 
-df_components, df_sets, df_projects = load_data_v10()
+data_sig = data_signature()
+df_components, df_sets, df_projects, df_bom_long = load_data_v10(data_sig)
 
 if df_components is None:
     st.error("❌ File not found. Please upload 'Mechatronics Project Parts_Data.xlsx'")
@@ -246,21 +330,201 @@ else:
 # --- HELPERS ---
 def get_col(df, candidates):
     if df is None or df.empty: return None
-    col_map = {c.lower(): c for c in df.columns}
+    col_map = df.attrs.get("_col_map") or {c.lower(): c for c in df.columns}
     for cand in candidates:
         if cand.lower() in col_map: return col_map[cand.lower()]
     return None
 
+def observed_counts(series):
+    # (values, counts) of the non-null values present. Categoricals are counted over their
+    # int codes with one bincount, in category order; anything else via a sorted np.unique
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        cnts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+        seen = np.flatnonzero(cnts)
+        return series.cat.categories.to_numpy()[seen], cnts[seen]
+    return np.unique(series.dropna().to_numpy(), return_counts=True)
+
+def count_values(series, label):
+    # Value counts as a [label, "Count"] frame, largest first; the stable sort
+    # breaks ties in category/alphabetical order
+    vals, cnts = observed_counts(series)
+    order = np.argsort(-cnts, kind="stable")
+    return pd.DataFrame({label: vals[order], "Count": cnts[order]})
+
+def top_n(series, n, label, other=None):
+    # Top-n value counts without sorting the long tail: partition to find the
+    # n-th largest count, then sort only the candidates (ties alphabetically).
+    # With `other`, the top n-1 are kept and the rest are summed into one bucket
+    vals, cnts = observed_counts(series)
+    if other and len(cnts) > n: n -= 1
+    keep = np.arange(len(cnts))
+    if len(cnts) > n:
+        kth = np.partition(cnts, len(cnts) - n)[len(cnts) - n]
+        keep = np.flatnonzero(cnts >= kth)
+    order = keep[np.lexsort((keep, -cnts[keep]))][:n]
+    top = pd.DataFrame({label: vals[order], "Count": cnts[order]})
+    rest = cnts.sum() - top["Count"].sum()
+    if other and rest: top.loc[len(top)] = [other, rest]
+    return top
+
+def contains_ci(series, word):
+    # Case-insensitive literal "contains". Categoricals are checked once per category and
+    # broadcast with isin; string columns go straight to the (Arrow) str.contains kernel
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        cats = series.cat.categories
+        return series.isin(cats[cats.astype(str).str.contains(word, case=False, regex=False)])
+    return series.astype("string").str.contains(word, case=False, regex=False, na=False).astype(bool)
+
+_NAT_RE = re.compile(r'([0-9]+)')
+
+@functools.lru_cache(maxsize=4096)
 def natural_sort_key(s):
-    return [int(text) if text.isdigit() else text.lower() for text in re.split('([0-9]+)', str(s))]
+    # Tuple so the key is hashable/cacheable; compares exactly like the old list
+    return tuple(int(text) if text.isdigit() else text.lower() for text in _NAT_RE.split(str(s)))
+
+def sort_by_set(df, set_col, set_order):
+    # Sort on a precomputed integer rank instead of per-row natural_sort_key tuples
+    rank = df[set_col].map(set_order).astype(int)
+    return df.assign(_sort_order=rank).sort_values("_sort_order").drop(columns="_sort_order")
+
+def kpi_html(label, value, color="#111827"):
+    return (f'<div class="kpi-card"><div class="kpi-label">{label}</div>'
+            f'<div class="kpi-value" style="color: {color};">{value}</div></div>')
+
+def kpi_row(*cards):
+    # One markdown element per row of (label, value[, color]) cards instead of one per card
+    st.markdown('<div class="kpi-row">' + "".join(kpi_html(*c) for c in cards) + '</div>', unsafe_allow_html=True)
+
+TABLE_PAGE = 500 # Rows per "Show more" step of the detail tables
+
+def show_table(df, cols, link_col, key, rows=None, **kwargs):
+    # Only the visible window is sliced and shipped to the browser on each rerun;
+    # `rows` are positions into df (from the cached views), sliced before the columns.
+    # The window remembers the result size it was widened for and resets when that changes
+    total = len(df) if rows is None else len(rows)
+    seen, n = st.session_state.get(key, (total, TABLE_PAGE))
+    if seen != total: n = TABLE_PAGE
+    shown = df.iloc[:n] if rows is None else df.iloc[rows[:n]]
+    config = {link_col: st.column_config.LinkColumn(link_col)} if link_col in cols else None
+    st.dataframe(shown[cols], hide_index=True, use_container_width=True, column_config=config, **kwargs)
+    if total > len(shown):
+        if st.button(f"Show {min(TABLE_PAGE, total - len(shown))} more of {total}", key=f"{key}_more"):
+            st.session_state[key] = (total, n + TABLE_PAGE)
+            st.rerun()
 
-def kpi_card(label, value, color="#111827"):
-    st.markdown(f"""
-    <div class="kpi-card">
-        <div class="kpi-label">{label}</div>
-        <div class="kpi-value" style="color: {color};">{value}</div>
-    </div>
-    """, unsafe_allow_html=True)
+# --- PRECOMPUTED AGGREGATES ---
+# Everything here depends only on the loaded data, not on the active filters,
+# so it is computed once per load instead of on every rerun.
+@st.cache_data(show_spinner=False)
+def precompute(_df_components, _df_sets, _df_projects, data_sig):
+    # Underscored frames are not hashed by Streamlit; data_sig keys the cache instead
+    df_components, df_sets, df_projects = _df_components, _df_sets, _df_projects
+    aggs = {}
+
+    c_status = get_col(df_components, ["Status"])
+    c_cat = get_col(df_components, ["Category"])
+    if c_status: aggs["status_opts"] = sorted(list(df_components[c_status].unique()))
+    if c_cat: aggs["cat_opts"] = sorted(list(df_components[c_cat].unique()))
+
+    s_set = get_col(df_sets, ["Set No", "Set"])
+    s_status = get_col(df_sets, ["Final Status", "Status"])
+    if s_set and s_status:
+        aggs["set_opts"] = sorted(list(df_sets[s_set].unique()), key=natural_sort_key)
+        aggs["set_order"] = {v: i for i, v in enumerate(aggs["set_opts"])}
+        df_stack = pd.crosstab(df_sets[s_set], df_sets[s_status]).stack().reset_index(name="Count")
+        df_stack = df_stack[df_stack["Count"] > 0].reset_index(drop=True)
+        aggs["set_status_crosstab"] = sort_by_set(df_stack, s_set, aggs["set_order"])
+
+    if df_projects is not None and not df_projects.empty:
+        aggs["project_opts"] = sorted(df_projects[df_projects.columns[0]].astype(str).unique())
+
+    return aggs
+
+aggs = precompute(df_components, df_sets, df_projects, data_sig)
+
+# --- FILTERED VIEWS ---
+# KPIs and chart data for one filter selection, keyed on the filter values (data_sig keys
+# the data). Reruns that don't change the filters, or go back to an earlier selection,
+# skip the pandas work; the pages only draw. "rows" are positions for the detail tables.
+@st.cache_data(show_spinner=False, max_entries=64)
+def inventory_view(_df_components, data_sig, sel_stat, sel_cat, search):
+    df_components = _df_components
+    c_cat = get_col(df_components, ["Category"])
+    c_status = get_col(df_components, ["Status"])
+    c_brand = get_col(df_components, ["Mfg", "Manufacturer", "Brand"])
+    c_sub1 = get_col(df_components, ["SubCategory"])
+    c_sub2 = get_col(df_components, ["SubCategory2"])
+    c_mfg_no = get_col(df_components, ["MfgNo", "Mfg No", "PartNo", "Part Number"])
+    c_name = get_col(df_components, ["Name", "Description", "Component Name"])
+
+    # Filters and search AND into one row mask; the frame is sliced once at the end
+    mask = np.ones(len(df_components), dtype=bool)
+    if c_status and sel_stat: mask &= df_components[c_status].isin(sel_stat).to_numpy()
+    if c_cat and sel_cat: mask &= df_components[c_cat].isin(sel_cat).to_numpy()
+    if search is not None:
+        # Searching against Uppercased columns
+        hits = np.zeros(len(df_components), dtype=bool)
+        for c in [c for c in [c_mfg_no, c_name, c_brand] if c]:
+            hits |= contains_ci(df_components[c], search).to_numpy()
+        mask &= hits
+    # Slice only when something was filtered out; a full boolean .loc still copies every column
+    df_filtered = df_components if mask.all() else df_components.loc[mask]
+
+    view = {"rows": np.flatnonzero(mask), "total": len(df_filtered)}
+    # clean() title-cases statuses, so a plain equality (a code compare on categories) is exact
+    view["avail"] = int((df_filtered[c_status] == "Available").sum()) if c_status else 0
+    view["n_cat"] = df_filtered[c_cat].nunique() if c_cat else 0
+    view["n_brand"] = df_filtered[c_brand].nunique() if c_brand else 0
+    if df_filtered.empty: return view
+
+    if c_status: view["status_counts"] = count_values(df_filtered[c_status], "Status")
+    if c_cat: view["cat_counts_top12"] = top_n(df_filtered[c_cat], 12, "Category")
+    if c_brand: view["brand_counts_top25"] = top_n(df_filtered[c_brand], 25, "Brand", other="Other")
+
+    if c_cat and c_sub1:
+        path = [c_cat, c_sub1]
+        if c_sub2 and df_filtered[c_sub2].notna().any(): path.append(c_sub2)
+        # Copy only the hierarchy columns, not the whole filtered frame
+        df_sun = df_filtered[path].copy()
+        # Ensure we don't map "undefined" or "-" here, use "General" for better UX
+        df_sun[c_cat] = df_sun[c_cat].astype(str).replace("-", "Unknown") 
+        if c_sub2 in path: df_sun[c_sub2] = df_sun[c_sub2].fillna("-")
+        # Aggregate server-side: ship one row per leaf to the browser, not one per part
+        view["sun_path"] = path
+        view["sun_agg"] = df_sun.groupby(path, observed=True).size().reset_index(name="Count")
+    return view
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def delivery_view(_df_sets, _aggs, data_sig, selected_sets, search):
+    df_sets, aggs = _df_sets, _aggs
+    s_set = get_col(df_sets, ["Set No", "Set"])
+    s_status = get_col(df_sets, ["Final Status", "Status"])
+    s_name = get_col(df_sets, ["xDesign Name", "Name", "Description", "Component Name"])
+    s_mfg = get_col(df_sets, ["Mfg No", "MfgNo", "Part No"])
+
+    mask = np.ones(len(df_sets), dtype=bool)
+    if selected_sets: mask &= df_sets[s_set].isin(selected_sets).to_numpy()
+    if search:
+        hits = np.zeros(len(df_sets), dtype=bool)
+        for c in [c for c in [s_name, s_mfg, s_status] if c]:
+            hits |= contains_ci(df_sets[c], search).to_numpy()
+        mask &= hits
+    df_view = df_sets if mask.all() else df_sets.loc[mask]
+
+    view = {"rows": np.flatnonzero(mask), "total": len(df_view)}
+    view["released"] = int((df_view[s_status] == "Released").sum())
+    if df_view.empty: return view
+
+    if search:
+        df_stack = df_view.groupby([s_set, s_status], observed=True).size().reset_index(name="Count")
+        df_stack = sort_by_set(df_stack, s_set, aggs["set_order"])
+    else:
+        # Set selection alone just picks rows out of the cached per-set counts
+        df_stack = aggs["set_status_crosstab"]
+        if selected_sets: df_stack = df_stack[df_stack[s_set].isin(selected_sets)]
+    view["set_stack"] = df_stack
+    return view
 
 # ------------------------------------------------------------
 # DASHBOARD 1: INVENTORY OVERVIEW
@@ -270,8 +534,6 @@ if page == "Inventory Overview":
     c_cat = get_col(df_components, ["Category"])
     c_status = get_col(df_components, ["Status"])
     c_brand = get_col(df_components, ["Mfg", "Manufacturer", "Brand"])
-    c_sub1 = get_col(df_components, ["SubCategory"])
-    c_sub2 = get_col(df_components, ["SubCategory2"])
     
     c_mfg_no = get_col(df_components, ["MfgNo", "Mfg No", "PartNo", "Part Number"])
     c_name = get_col(df_components, ["Name", "Description", "Component Name"])
@@ -281,98 +543,90 @@ if page == "Inventory Overview":
     # Duplicate filter in main expander for accessibility
     with st.expander("🔍 Filter Options", expanded=False):
         c_f1, c_f2 = st.columns(2)
-        df_filtered = df_components.copy()
         filters_active = False
 
         sel_stat = []
         sel_cat = []
         
         if c_status:
-            opts = sorted(list(df_components[c_status].unique()))
+            opts = aggs["status_opts"]
             with c_f1:
                 sel_stat = st.multiselect("Status", opts, default=opts, key="main_stat")
             if len(sel_stat) < len(opts): filters_active = True
-            if sel_stat: df_filtered = df_filtered[df_filtered[c_status].isin(sel_stat)]
             
         if c_cat:
-            opts = sorted(list(df_components[c_cat].unique()))
+            opts = aggs["cat_opts"]
             with c_f2:
                 sel_cat = st.multiselect("Category", opts, default=opts, key="main_cat")
             if len(sel_cat) < len(opts): filters_active = True
-            if sel_cat: df_filtered = df_filtered[df_filtered[c_cat].isin(sel_cat)]
 
     c_title, c_search = st.columns([1, 1])
     with c_title: st.markdown("## 🏭 Inventory Cockpit")
     with c_search:
         search_inv = st.text_input("Search", placeholder="Search Mfg No, Name, or Brand...", label_visibility="collapsed")
+        search_term = None
         if search_inv:
             search_term = search_inv.strip()
-            # Searching against Uppercased columns
-            search_targets = [c for c in [c_mfg_no, c_name, c_brand] if c]
-            mask = df_filtered[search_targets].astype(str).apply(lambda x: x.str.contains(search_term, case=False)).any(axis=1)
-            df_filtered = df_filtered[mask]
             filters_active = True 
 
-    total = len(df_filtered)
-    avail = df_filtered[c_status].str.contains("Available", case=False).sum() if c_status else 0
-    pct = int((avail/total)*100) if total > 0 else 0
+    view = inventory_view(df_components, data_sig, tuple(sel_stat), tuple(sel_cat), search_term)
+
+    total = view["total"]
+    pct = int((view["avail"]/total)*100) if total > 0 else 0
     
-    k1, k2, k3, k4 = st.columns(4)
-    with k1: kpi_card("Parts Found", total)
-    with k2: kpi_card("Availability", f"{pct}%", "#16a34a" if pct > 50 else "#dc2626")
-    with k3: kpi_card("Categories", df_filtered[c_cat].nunique() if c_cat else 0)
-    with k4: kpi_card("Manufacturers", df_filtered[c_brand].nunique() if c_brand else 0)
+    kpi_row(
+        ("Parts Found", total),
+        ("Availability", f"{pct}%", "#16a34a" if pct > 50 else "#dc2626"),
+        ("Categories", view["n_cat"]),
+        ("Manufacturers", view["n_brand"]),
+    )
 
     st.markdown("<br>", unsafe_allow_html=True)
+    # Plotly is imported only once a page has charts to draw, after the KPIs have gone out
+    import plotly.express as px
+    import plotly.graph_objects as go
 
     c_left, c_right = st.columns([1, 2])
     with c_left:
         st.markdown('<div class="card-container"><div class="chart-title">Status Overview</div>', unsafe_allow_html=True)
-        if c_status and not df_filtered.empty:
-            stat_counts = df_filtered[c_status].value_counts().reset_index()
-            stat_counts.columns = ["Status", "Count"]
-            fig = px.pie(stat_counts, names="Status", values="Count", hole=0.6, color_discrete_sequence=px.colors.qualitative.Pastel)
+        if "status_counts" in view:
+            fig = px.pie(view["status_counts"], names="Status", values="Count", hole=0.6, color_discrete_sequence=px.colors.qualitative.Pastel)
             st.plotly_chart(theme_plotly(fig), use_container_width=True)
         else: st.info("No data.")
         st.markdown('</div>', unsafe_allow_html=True)
 
     with c_right:
         st.markdown('<div class="card-container"><div class="chart-title">Category Distribution</div>', unsafe_allow_html=True)
-        if c_cat and not df_filtered.empty:
-            cat_counts = df_filtered[c_cat].value_counts().reset_index().head(12)
-            cat_counts.columns = ["Category", "Count"]
-            fig = px.bar(cat_counts, x="Category", y="Count", text="Count", color="Count", color_continuous_scale="Blues")
+        if "cat_counts_top12" in view:
+            fig = px.bar(view["cat_counts_top12"], x="Category", y="Count", text="Count", color="Count", color_continuous_scale="Blues")
             st.plotly_chart(theme_plotly(fig), use_container_width=True)
         else: st.info("No data.")
         st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown('<div class="card-container"><div class="chart-title">Top Manufacturers</div>', unsafe_allow_html=True)
-    if c_brand and not df_filtered.empty:
-        brand_data = df_filtered[c_brand].value_counts().reset_index().head(25)
-        brand_data.columns = ["Brand", "Count"]
-        fig = px.treemap(brand_data, path=["Brand"], values="Count", color="Count", color_continuous_scale="Mint")
+    if "brand_counts_top25" in view:
+        # Flat name -> count tiles: build the trace directly, px.treemap's path handling costs ~50ms
+        brands, counts = view["brand_counts_top25"]["Brand"].tolist(), view["brand_counts_top25"]["Count"].tolist()
+        fig = go.Figure(go.Treemap(
+            labels=brands, ids=brands, parents=[""] * len(brands), values=counts, branchvalues="total",
+            marker=dict(colors=counts, colorscale="Mint", showscale=True, colorbar=dict(title="Count")),
+            hovertemplate="%{label}<br>Count=%{value}<extra></extra>",
+        ))
         st.plotly_chart(theme_plotly(fig, height=350), use_container_width=True)
     else: st.info("No data.")
     st.markdown('</div>', unsafe_allow_html=True)
 
     st.markdown('<div class="card-container"><div class="chart-title">Data Explorer (Sunburst)</div>', unsafe_allow_html=True)
-    if c_cat and c_sub1 and not df_filtered.empty:
-        df_sun = df_filtered.copy()
-        # Ensure we don't map "undefined" or "-" here, use "General" for better UX
-        df_sun[c_cat] = df_sun[c_cat].replace("-", "Unknown") 
-        path = [c_cat, c_sub1]
-        if c_sub2 and df_sun[c_sub2].notna().any():
-            df_sun[c_sub2] = df_sun[c_sub2].fillna("-")
-            path.append(c_sub2)
-        fig = px.sunburst(df_sun, path=path, color=c_cat, color_discrete_sequence=px.colors.qualitative.Prism, maxdepth=3)
+    if "sun_agg" in view:
+        fig = px.sunburst(view["sun_agg"], path=view["sun_path"], values="Count", color=c_cat, color_discrete_sequence=px.colors.qualitative.Prism, maxdepth=3)
         st.plotly_chart(theme_plotly(fig, height=600), use_container_width=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
     if filters_active:
         st.markdown('<div class="card-container"><div class="chart-title">📋 Component Details</div>', unsafe_allow_html=True)
-        if not df_filtered.empty:
+        if total > 0:
             cols_to_show = [c for c in [c_mfg_no, c_brand, c_name, c_cat, c_status, c_link] if c]
-            st.dataframe(df_filtered[cols_to_show], hide_index=True, use_container_width=True)
+            show_table(df_components, cols_to_show, c_link, "inv_rows", rows=view["rows"])
         else: st.warning("No components match your filters.")
         st.markdown('</div>', unsafe_allow_html=True)
     else: st.caption("👇 *Use the Search bar or Sidebar Filters to see the detailed component list.*")
@@ -395,34 +649,23 @@ elif page == "Delivery Tracking":
     st.markdown("## 🚚 Delivery Tracking")
     f1, f2 = st.columns(2)
     with f1:
-        all_sets = sorted(list(df_sets[s_set].unique()), key=natural_sort_key)
+        all_sets = aggs["set_opts"]
         selected_sets = st.multiselect("Select Set(s)", all_sets, placeholder="Choose specific sets (e.g. Set 1)")
     with f2:
         search_del = st.text_input("Text Search", placeholder="Search Mfg No, Name, or Status...", label_visibility="visible")
 
-    df_view = df_sets.copy()
-    is_filtered = False
+    is_filtered = bool(selected_sets or search_del)
+    view = delivery_view(df_sets, aggs, data_sig, tuple(selected_sets), search_del)
 
-    if selected_sets:
-        df_view = df_view[df_view[s_set].isin(selected_sets)]
-        is_filtered = True
-    
-    if search_del:
-        target_cols = [c for c in [s_name, s_mfg, s_status] if c] 
-        mask = df_view[target_cols].astype(str).apply(lambda x: x.str.contains(search_del, case=False)).any(axis=1)
-        df_view = df_view[mask]
-        is_filtered = True
-
-    total = len(df_view)
-    released = df_view[s_status].str.contains("Released", case=False, na=False).sum()
+    total = view["total"]
+    released = view["released"]
     pending = total - released
     pct_rel = int((released/total)*100) if total > 0 else 0
     
-    k1, k2, k3 = st.columns(3)
-    with k1: kpi_card("Items Found", total)
-    with k2: kpi_card("Released", released, "#16a34a")
-    with k3: kpi_card("Pending", pending, "#dc2626")
+    kpi_row(("Items Found", total), ("Released", released, "#16a34a"), ("Pending", pending, "#dc2626"))
     st.markdown("<br>", unsafe_allow_html=True)
+    import plotly.express as px
+    import plotly.graph_objects as go
 
     c1, c2 = st.columns([1, 2])
     with c1:
@@ -433,20 +676,20 @@ elif page == "Delivery Tracking":
 
     with c2:
         st.markdown('<div class="card-container"><div class="chart-title">Set Composition</div>', unsafe_allow_html=True)
-        if not df_view.empty:
-            df_stack = df_view.groupby([s_set, s_status]).size().reset_index(name="Count")
-            df_stack = df_stack.sort_values(by=s_set, key=lambda col: col.map(lambda x: natural_sort_key(x)))
+        if "set_stack" in view:
+            df_stack = view["set_stack"]
             colors = {"Released": "#22c55e", "Backorder": "#ef4444", "Split": "#eab308", "Out Of Stock": "#dc2626"}
             fig = px.bar(df_stack, x=s_set, y="Count", color=s_status, color_discrete_map=colors)
+            fig.update_layout(hovermode="x") # One hover lookup per set instead of per stacked segment
             st.plotly_chart(theme_plotly(fig, height=280), use_container_width=True)
         else: st.info("No data matches current filter.")
         st.markdown('</div>', unsafe_allow_html=True)
 
     if is_filtered:
         st.markdown('<div class="card-container"><div class="chart-title">📋 Complete Manifest</div>', unsafe_allow_html=True)
-        if not df_view.empty:
+        if total > 0:
             display_cols = [c for c in [s_set, s_mfg, s_name, s_status, s_link] if c is not None]
-            st.dataframe(df_view[display_cols], hide_index=True, use_container_width=True, height=600)
+            show_table(df_sets, display_cols, s_link, "del_rows", rows=view["rows"], height=600)
         else: st.warning("No items match your search criteria.")
         st.markdown('</div>', unsafe_allow_html=True)
     else: st.caption("👇 *Select a Set or Search to view individual line items.*")
@@ -462,22 +705,13 @@ elif page == "Project Explorer":
         st.stop()
 
     p_name_col = df_projects.columns[0]
-    comp_cols = [c for c in df_projects.columns if "Component" in c]
 
-    all_projects = sorted(df_projects[p_name_col].astype(str).unique())
+    all_projects = aggs["project_opts"]
     selected_proj = st.selectbox("Select a Project to View Bill of Materials (BOM)", all_projects, index=None, placeholder="Choose a Project...")
 
     if selected_proj:
-        proj_row = df_projects[df_projects[p_name_col] == selected_proj]
-        bom = proj_row.melt(id_vars=[p_name_col], value_vars=comp_cols, value_name="MfgNo").dropna()
-        
-        # KEY FIX: Pre-process keys identically to load_data_v10 logic
-        bom["MfgNo"] = bom["MfgNo"].astype(str).str.strip().str.upper()
-        bom["MfgNo"] = bom["MfgNo"].str.replace(r'\.0$', '', regex=True)
-        
-        # Filter junk
-        bom = bom[bom["MfgNo"].str.len() > 1]
-        bom = bom[~bom["MfgNo"].isin(["-", "UNKNOWN", "NAN", "NONE", "NAT", "0"])]
+        # Keys were already cleaned and melted once in load_data_v10
+        bom = df_bom_long[df_bom_long[p_name_col] == selected_proj]
         
         c_mfg_no = get_col(df_components, ["MfgNo", "Mfg No", "PartNo", "Part Number"])
         
@@ -487,24 +721,30 @@ elif page == "Project Explorer":
             df_bom = pd.merge(bom, df_components, left_on="MfgNo", right_on=c_mfg_no, how="left")
             
             # FINAL SWEEP: Replace any lingering NaNs from the merge with "-"
-            df_bom = df_bom.fillna("-")
+            # (as object: merged category columns can't take "-" as a new value).
+            # Unmatched links stay empty: LinkColumn would render "-" as a clickable href
+            c_link = get_col(df_components, ["Link", "Url"])
+            df_bom = df_bom.astype(object)
+            df_bom = df_bom.fillna({c: "-" for c in df_bom.columns if c != c_link})
             
             total_parts = len(df_bom)
             c_status = get_col(df_components, ["Status"])
             
             if c_status in df_bom.columns:
-                in_stock = df_bom[c_status].str.contains("Available", case=False, na=False).sum()
+                in_stock = int((df_bom[c_status] == "Available").sum())
                 missing = total_parts - in_stock
                 readiness = int((in_stock/total_parts)*100) if total_parts > 0 else 0
             else:
                 readiness = 0
                 missing = total_parts
 
-            k1, k2, k3 = st.columns(3)
-            with k1: kpi_card("Total Components", total_parts)
-            with k2: kpi_card("Readiness", f"{readiness}%", "#16a34a" if readiness == 100 else "#eab308")
-            with k3: kpi_card("Missing / Issues", missing, "#dc2626" if missing > 0 else "#16a34a")
+            kpi_row(
+                ("Total Components", total_parts),
+                ("Readiness", f"{readiness}%", "#16a34a" if readiness == 100 else "#eab308"),
+                ("Missing / Issues", missing, "#dc2626" if missing > 0 else "#16a34a"),
+            )
             st.markdown("<br>", unsafe_allow_html=True)
+            import plotly.express as px
 
             c_cat = get_col(df_components, ["Category"])
             vc1, vc2 = st.columns([1, 2])
@@ -512,8 +752,7 @@ elif page == "Project Explorer":
             with vc1:
                 st.markdown('<div class="card-container"><div class="chart-title">Stock Status</div>', unsafe_allow_html=True)
                 if c_status in df_bom.columns:
-                    status_data = df_bom[c_status].value_counts().reset_index()
-                    status_data.columns = ["Status", "Count"]
+                    status_data = count_values(df_bom[c_status], "Status")
                     fig_stat = px.pie(status_data, names="Status", values="Count", hole=0.6, color_discrete_sequence=px.colors.qualitative.Pastel)
                     st.plotly_chart(theme_plotly(fig_stat, height=300), use_container_width=True)
                 else: st.info("Status info unavailable")
@@ -522,8 +761,7 @@ elif page == "Project Explorer":
             with vc2:
                 st.markdown('<div class="card-container"><div class="chart-title">Component Composition</div>', unsafe_allow_html=True)
                 if c_cat and c_cat in df_bom.columns:
-                    cat_data = df_bom[c_cat].replace("-", "Uncategorized").value_counts().reset_index().head(10)
-                    cat_data.columns = ["Category", "Count"]
+                    cat_data = top_n(df_bom[c_cat].replace("-", "Uncategorized"), 10, "Category")
                     fig_cat = px.bar(cat_data, x="Count", y="Category", text="Count", orientation='h', color="Count", color_continuous_scale="Blues")
                     fig_cat.update_layout(yaxis=dict(autorange="reversed"), xaxis_title=None, yaxis_title=None)
                     st.plotly_chart(theme_plotly(fig_cat, height=300), use_container_width=True)
@@ -532,14 +770,13 @@ elif page == "Project Explorer":
 
             st.markdown('<div class="card-container"><div class="chart-title">📋 Bill of Materials</div>', unsafe_allow_html=True)
             c_name = get_col(df_components, ["Name", "Description", "Component Name"])
-            c_link = get_col(df_components, ["Link", "Url"])
             disp_cols = ["MfgNo"]
             if c_name: disp_cols.append(c_name)
             if c_status: disp_cols.append(c_status)
             if c_link: disp_cols.append(c_link)
             
             final_cols = [c for c in disp_cols if c in df_bom.columns]
-            st.dataframe(df_bom[final_cols], hide_index=True, use_container_width=True, height=500)
+            show_table(df_bom, final_cols, c_link, "bom_rows", height=500)
             st.markdown('</div>', unsafe_allow_html=True)
         else:
             st.error("Could not link Project Data to Inventory. 'MfgNo' column missing in Inventory.")